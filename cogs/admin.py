@@ -0,0 +1,58 @@
+import logging
+from discord.ext import commands
+
+from core.users import cache_report
+from core.startup import startup
+from core.tracing import tracer, set_slow_callbacks, profile_loop, SLOW_CALLBACK_MS, TRACE_FILE
+
+PROFILE_MAX_SECONDS = 120
+
+class Admin(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    async def cog_check(self, ctx):
+        return ctx.author.guild_permissions.administrator if ctx.guild else False
+
+    @commands.command()
+    async def memstats(self, ctx):
+        await ctx.send(f"🧠 `{cache_report()}`")
+
+    @commands.command(name="startup")
+    async def startup_stats(self, ctx):
+        await ctx.send(f"🚀 `{startup.report()}`")
+
+    @commands.command()
+    async def trace(self, ctx, mode: str = None):
+        # `!trace on` / `!trace off`; no argument reports the current state
+        if mode == "on":
+            tracer.start()
+        elif mode == "off":
+            tracer.stop()
+        status = "on" if tracer.enabled else "off"
+        await ctx.send(f"🔎 Tracing is **{status}** (`{TRACE_FILE}`).")
+
+    @commands.command()
+    async def slowcallbacks(self, ctx, threshold: str = None):
+        # `!slowcallbacks off`, or `!slowcallbacks [ms]` to log anything blocking the loop longer
+        if threshold == "off":
+            set_slow_callbacks(None)
+            return await ctx.send("🐢 Slow-callback detection **off**.")
+        try:
+            ms = float(threshold) if threshold else SLOW_CALLBACK_MS
+        except ValueError:
+            return await ctx.send("❌ Usage: `!slowcallbacks [ms|off]`")
+        set_slow_callbacks(ms)
+        await ctx.send(f"🐢 Logging callbacks that block the loop for more than **{ms:g} ms**.")
+
+    @commands.command()
+    async def profile(self, ctx, seconds: float = 10.0):
+        seconds = max(1.0, min(seconds, PROFILE_MAX_SECONDS))
+        await ctx.send(f"⏱️ Profiling the event loop for {seconds:g}s…")
+        report = await profile_loop(seconds)
+        logging.info("Profile report:\n%s", report)
+        # Discord messages cap at 2000 characters
+        await ctx.send(f"```\n{report[:1900]}\n```")
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Admin(bot))
@@ -0,0 +1,82 @@
+from discord.ext import commands
+
+from core.state import state
+from core.outbox import dm_outbox
+from core.registry import UserRecord
+
+# ─────────────────────────────────────────────────────
+# Badge Definitions
+# ─────────────────────────────────────────────────────
+# Badge definitions: key → name, emoji, and the stat threshold
+BADGE_DEFINITIONS = {
+    "raid_veteran_10": {
+        "name": "Raid Veteran",
+        "emoji": "🏆",
+        "threshold": {"stats_key": "raids_joined", "value": 10}
+    },
+    "backup_champion_3": {
+        "name": "Backup Champion",
+        "emoji": "🛡️",
+        "threshold": {"stats_key": "promotions", "value": 3}
+    },
+    "consecutive_raider_5": {
+        "name": "Consecutive Raider",
+        "emoji": "🔥",
+        "threshold": {"stats_key": "longest_streak", "value": 5}
+    },
+    # add more badges here...
+}
+
+def check_for_new_badges(uid: int, rec: UserRecord, extra: dict[str, int] | None = None):
+    """
+    Looks at the user's counters (plus any `extra` stats), awards any badges
+    not yet given, queues a DM to the user.
+    """
+    for key, badge in BADGE_DEFINITIONS.items():
+        skey  = badge["threshold"]["stats_key"]
+        need  = badge["threshold"]["value"]
+        have  = extra[skey] if extra and skey in extra else getattr(rec, skey, 0)
+        if have >= need and state.users.add_badge(rec, key):
+            # DM them their new badge
+            dm_outbox.send(
+                uid,
+                f"🎉 **Congratulations!** You earned the {badge['emoji']} **{badge['name']}** badge!"
+            )
+
+class Badges(commands.Cog):
+    """Raid stats and badge awards; the raids cog calls in via bot.get_cog("Badges")."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    def badge_str(self, uid: int) -> str:
+        rec = state.users.get(uid)
+        if not rec or not rec.badges:
+            return ""
+        emojis = [
+            BADGE_DEFINITIONS[b]["emoji"]
+            for b in state.users.badges_of(rec)
+            if b in BADGE_DEFINITIONS
+        ]
+        return " " + "".join(emojis) if emojis else ""
+
+    def reward_signup(self, uid: int, name: str | None = None):
+        rec = state.users.record(uid)
+        rec.raids_joined += 1
+        if name:
+            rec.name = name
+
+        check_for_new_badges(uid, rec)
+
+    def reward_promotion(self, uid: int):
+        rec = state.users.record(uid)
+        rec.promotions += 1
+
+        check_for_new_badges(uid, rec)
+
+    def reward_attendance(self, uid: int):
+        # Streaks come from the attendance indexes, not from the user record
+        check_for_new_badges(uid, state.users.record(uid), {"longest_streak": state.attendance.longest_streak(uid)})
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Badges(bot))
@@ -0,0 +1,68 @@
+import random
+from discord.ext import commands
+
+from core.state import state
+
+def scored_players():
+    # Only users who have rolled at least once have a score
+    return [(uid, rec) for uid, rec in state.users.users.items() if rec.score]
+
+class Dice(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @commands.command(name="Raidleaderboard")
+    async def Raidleaderboard(self, ctx):
+        players = scored_players()
+        if not players:
+            return await ctx.send("No scores yet. Start raiding to earn points!")
+
+        sorted_scores = sorted(
+            [(uid, rec.score) for uid, rec in players if uid != self.bot.user.id],
+            key=lambda x: x[1], reverse=True
+        )
+        lines = []
+        for uid, pts in sorted_scores:
+            user = await self.bot.fetch_user(uid)
+            lines.append(f"**{user.name}**: {pts} point{'s' if pts != 1 else ''}")
+
+        await ctx.send("🏆 **Raid Leaderboard** 🏆\n" + "\n".join(lines))
+
+    @commands.command()
+    async def roll(self, ctx):
+        rec = state.users.record(ctx.author.id)
+        rec.name = ctx.author.display_name
+
+        roll = random.randint(1, 6)
+        rec.score += roll
+        state.save_users()
+
+        # 🎉 Reactions based on roll
+        if roll == 6:
+            reaction = "🔥 Critical hit!"
+        elif roll == 1:
+            reaction = "😬 Oof... better luck next time."
+        else:
+            reaction = "🎲 Nice roll!"
+
+        await ctx.send(f"{ctx.author.mention} rolled a {roll}! Total score: {rec.score}\n{reaction}")
+
+    @commands.command()
+    async def leaderboard(self, ctx):
+        players = scored_players()
+        if not players:
+            await ctx.send("No scores yet! Be the first to roll 🎲")
+            return
+
+        # Sort by score descending
+        top_players = sorted(players, key=lambda x: x[1].score, reverse=True)[:5]
+
+        # Format leaderboard
+        leaderboard_text = "**🏆 Weekly Dice Leaderboard 🏆**\n"
+        for i, (uid, rec) in enumerate(top_players, start=1):
+            leaderboard_text += f"{i}. {rec.name or uid} — {rec.score} points\n"
+
+        await ctx.send(leaderboard_text)
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Dice(bot))
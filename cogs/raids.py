@@ -0,0 +1,1170 @@
+import os
+import re
+import time
+import pytz
+import asyncio
+import logging
+import discord
+from typing import Optional
+from datetime import datetime, timedelta
+from discord.ext import commands, tasks
+
+from core.logs import raw_log, slot_log, reminder_log
+from core.state import state
+from core.outbox import dm_outbox
+from core.tracing import span, traced_lock
+from core.waitlist import Waitlist
+from core.startup import startup
+from core.archive import raid_archive
+from core.users import get_cached_user, get_member, remember_member, peek_display_name
+
+# === Configuration ===
+ALLOW_OVERWRITE = False  # Toggle for slot overwrite protection
+FIRETEAM_SIZE   = 6
+WAITLIST_SHOWN  = int(os.getenv("WAITLIST_SHOWN", "5"))          # waitlisted names rendered in the embed
+WAITLIST_PRIORITY = os.getenv("WAITLIST_PRIORITY", "signup")   # "signup", "attendance" or "badges"
+
+def badges():
+    # Resolved per call so a reloaded Badges cog is picked up; None if unloaded
+    return state.bot.get_cog("Badges")
+
+# ─────────────────────────────────────────────────────
+# Extract date from an embed’s hidden field  
+# ─────────────────────────────────────────────────────
+def extract_date_from_message(message) -> str | None:
+    if not message.embeds:
+        return None
+
+    embed = message.embeds[0]
+
+    # 1) Look for a named Date field
+    for field in embed.fields:
+        if "date" in field.name.lower():
+            return field.value.strip()
+
+    # 2) Legacy fallback: first field is the date
+    if embed.fields:
+        return embed.fields[0].value.strip()
+
+    return None
+# —————————————————————————————————————————
+# Shared Helper: Build Raid Message Lines
+# —————————————————————————————————————————
+def snapshot_lineup(date_str: str) -> dict:
+    # Everything a render reads, copied so the embed can be built without holding slot_lock.
+    # Read-only: rendering a finished raid's post must not bring its date back into hot state.
+    queue = state.waitlists.get(date_str) or Waitlist()
+    return {
+        "fireteam": dict(state.fireteams.get(date_str, {})),
+        "waitlist": queue.top(WAITLIST_SHOWN),
+        "waiting":  len(queue),
+        "joined":   {uid for uid, change in state.recent_changes.items() if change == "joined"},
+    }
+
+async def build_raid_lines(date_str: str, buttons: bool = False, snapshot: dict | None = None) -> list[str]:
+    lineup       = snapshot or snapshot_lineup(date_str)
+    fire_slots   = lineup["fireteam"]
+    badge_cog    = badges()
+
+    lines = [
+        f"📅 **Day:** {date_str} | 🕗 **Time:** 20:00 BST",
+        "",
+        "🎯 **Fireteam Lineup (6 Players):**"
+    ]
+
+    # Fireteam slots
+    for i in range(FIRETEAM_SIZE):
+        uid = fire_slots.get(i)
+        if not uid:
+            lines.append(f"{i+1}. Empty Slot")
+            continue
+
+        try:
+            user = await get_cached_user(uid)
+        except Exception as e:
+            logging.warning("Could not fetch user %s: %s", uid, e)
+            lines.append(f"{i+1}. Unknown User")
+            continue
+
+        mark = " ✅" if uid in lineup["joined"] else ""
+        badge_str = badge_cog.badge_str(uid) if badge_cog else ""
+        lines.append(f"{i+1}. {user.display_name}{mark}{badge_str}")
+
+    # Waitlist: only the head is rendered, however long it gets
+    lines.extend(["", f"🛡️ **Waitlist ({lineup['waiting']}):**"])
+    if not lineup["waiting"]:
+        lines.append("Nobody waiting")
+    for i, uid in enumerate(lineup["waitlist"]):
+        try:
+            user = await get_cached_user(uid)
+        except Exception as e:
+            logging.warning("Could not fetch backup user %s: %s", uid, e)
+            lines.append(f"Backup {i+1}: Unknown User")
+            continue
+
+        mark = " ✅" if uid in lineup["joined"] else ""
+        badge_str = badge_cog.badge_str(uid) if badge_cog else ""
+        lines.append(f"Backup {i+1}: {user.display_name}{mark}{badge_str}")
+    if lineup["waiting"] > WAITLIST_SHOWN:
+        lines.append(f"…and {lineup['waiting'] - WAITLIST_SHOWN} more")
+
+    # Footer
+    if buttons:
+        lines.extend([
+            "",
+            "✅ Press **Join** if you're joining the raid.",
+            "🛡️ Press **Backup** to go straight onto the waitlist.",
+            "❌ Press **Leave** if you can't make it.",
+        ])
+    else:
+        lines.extend([
+            "",
+            "✅ React with a ✅ if you're joining the raid.",
+            "❌ React with a ❌ if you can't make it.",
+        ])
+    lines.extend([
+        "",
+        "⚔️ Let’s assemble a legendary team and conquer the Desert Perpetual!"
+    ])
+
+    return lines
+
+def log_slot_change(
+    action: str,
+    member: discord.Member,
+    date_str: str,
+    slot: int,
+    previous_user: Optional[discord.Member] = None
+) -> None:
+    if previous_user:
+        slot_log.info(
+            "[SLOT CHANGE] %s: %s → slot %d on %s, replacing %s",
+            action, member.display_name, slot + 1, date_str, previous_user.display_name
+        )
+    else:
+        slot_log.info(
+            "[SLOT CHANGE] %s: %s → slot %d on %s",
+            action, member.display_name, slot + 1, date_str
+        )
+
+def try_parse_date(text):
+    # Match common date formats
+    patterns = [
+        r"\b\d{4}-\d{2}-\d{2}\b",              
+        r"\b\d{1,2} [A-Za-z]{3,9} \d{4}\b",     
+        r"\b[A-Za-z]+,? \d{1,2} [A-Za-z]+ \d{4}\b",  
+    ]
+
+    for pattern in patterns:
+        match = re.search(pattern, text)
+        if match:
+            try:
+                return datetime.strptime(match.group(), "%Y-%m-%d").strftime("%Y-%m-%d")
+            except ValueError:
+                try:
+                    return datetime.strptime(match.group(), "%d %b %Y").strftime("%Y-%m-%d")
+                except ValueError:
+                    try:
+                        return datetime.strptime(match.group(), "%A, %d %B %Y").strftime("%Y-%m-%d")
+                    except ValueError:
+                        pass
+    return None
+
+# —————————————————————————————————————————
+# Debounced Embed Updates
+# —————————————————————————————————————————
+def schedule_update(message_id: int, date_str: str):
+    if message_id in state.update_tasks:
+        state.update_tasks[message_id].cancel()
+    state.update_tasks[message_id] = asyncio.create_task(_debounced_update(message_id, date_str))
+
+async def _debounced_update(message_id: int, date_str: str):
+    try:
+        await asyncio.sleep(1)
+        await update_raid_message(message_id, date_str)
+    except Exception as e:
+        logging.error("Failed to update raid message %s: %s", message_id, e)
+    finally:
+        state.update_tasks.pop(message_id, None)
+
+# === Raid Post Settings ===
+EVENT_NAME   = "Desert Perpetual"
+EVENT_TITLE  = f"🔥 CLAN RAID EVENT: {EVENT_NAME} 🔥"
+EMBED_COLOR  = 0xFF4500
+CHANNEL_ID = 1209484610568720384  # your raid channel ID
+
+# —————————————————————————————————————————
+# Helper: Build the exact raid message text
+# —————————————————————————————————————————
+async def build_raid_message(date_str: str, buttons: bool = False, snapshot: dict | None = None) -> str:
+    lines = await build_raid_lines(date_str, buttons, snapshot)
+    return "\n".join(lines)
+
+# —————————————————————————————————————————
+# Scheduler: Run once each Sunday at 09:00 BST
+# —————————————————————————————————————————
+@tasks.loop(minutes=1)
+async def sunday_scheduler():
+    tz  = pytz.timezone("Europe/London")
+    now = datetime.now(tz)
+
+    # Trigger only once, on Sunday at 09:00
+    if now.weekday() == 6 and now.hour == 9 and state.last_schedule_date != now.date():
+        logging.info("🗓️ Sunday 09:00 reached — rotating weekly posts")
+        await schedule_weekly_posts_function()
+        state.last_schedule_date = now.date()
+
+    # Reset flag after Sunday so next Sunday can run again
+    if now.weekday() != 6:
+        state.last_schedule_date = None
+
+@sunday_scheduler.before_loop
+async def _before_sunday_scheduler():
+    await state.bot.wait_until_ready()
+
+# —————————————————————————————————————————
+# Weekly rotation pipeline
+# —————————————————————————————————————————
+SIGNUP_EMOJIS        = ("✅", "❌")
+ROTATION_CONCURRENCY = 4                    # max in-flight deletes/reactions during a rotation
+BULK_DELETE_MAX_AGE  = timedelta(days=13)   # Discord rejects bulk deletes of messages older than 14 days
+
+async def _delete_stale_posts(channel, stale: list, sem: asyncio.Semaphore):
+    cutoff = discord.utils.utcnow() - BULK_DELETE_MAX_AGE
+    bulk   = [m for m in stale if m.created_at > cutoff]
+    single = [m for m in stale if m.created_at <= cutoff]
+
+    # Bulk endpoint takes 2–100 recent messages per call
+    for i in range(0, len(bulk), 100):
+        chunk = bulk[i:i + 100]
+        if len(chunk) < 2:
+            single.extend(chunk)
+            continue
+        try:
+            with span("bulk delete", "rest", count=len(chunk)):
+                await channel.delete_messages(chunk)
+            logging.info("Bulk-deleted %d old raid posts", len(chunk))
+        except discord.HTTPException as e:
+            logging.warning("Bulk delete failed (%s), falling back to single deletes", e)
+            single.extend(chunk)
+
+    async def _delete(msg):
+        async with sem:
+            try:
+                await msg.delete()
+                logging.info("Deleted old raid post %s", msg.id)
+            except discord.NotFound:
+                pass
+            except Exception as e:
+                logging.error("Error deleting %s: %s", msg.id, e)
+
+    await asyncio.gather(*(_delete(m) for m in single))
+
+async def _ensure_reactions(msg, sem: asyncio.Semaphore):
+    # Skips emojis we already added, so an interrupted rotation can be resumed
+    have = {str(r.emoji) for r in msg.reactions if r.me}
+    for emoji in SIGNUP_EMOJIS:
+        if emoji in have:
+            continue
+        async with sem:
+            await msg.add_reaction(emoji)
+
+def upcoming_dates(now: datetime) -> list[str]:
+    # Next 7 date strings: Sun → Sat
+    return [(now + timedelta(days=i)).strftime("%A, %d %B") for i in range(7)]
+
+async def find_raid_posts(channel) -> list[tuple[discord.Message, str]]:
+    # Our raid posts are embeds (message.content is empty), so match on the embed title
+    posts = []
+    async for m in channel.history(limit=200):
+        if m.author == state.bot.user and m.embeds and m.embeds[0].title == EVENT_TITLE:
+            date_val = extract_date_from_message(m)
+            if date_val:
+                posts.append((m, date_val))
+    return posts
+
+async def schedule_weekly_posts_function():
+    async with traced_lock(state.rotation_lock, "rotation_lock"):
+        await _rotate_weekly_posts()
+
+async def _rotate_weekly_posts():
+    started = time.monotonic()
+    tz      = pytz.timezone("Europe/London")
+    now     = datetime.now(tz)
+    channel = state.bot.get_channel(CHANNEL_ID)
+    if not channel:
+        logging.error("Could not find channel %s", CHANNEL_ID)
+        return
+
+    upcoming = upcoming_dates(now)
+
+    # 1) Scan existing raid posts and split into live / stale
+    live, stale = [], []
+    for m, date_val in await find_raid_posts(channel):
+        (live if date_val in upcoming else stale).append((m, date_val))
+
+    # 2) Rebuild previous_week_messages so you know exactly what’s live
+    state.previous_week_messages.clear()
+    state.previous_week_messages.extend(m.id for m, _ in live)
+
+    live_dates = {d for _, d in live}
+    missing    = [d for d in upcoming if d not in live_dates]
+    for date_str in upcoming:
+        if date_str in live_dates:
+            logging.info("Skipping post for %s (already exists)", date_str)
+
+    # 3) Kick off deletes and any unfinished reactions in the background
+    sem   = asyncio.Semaphore(ROTATION_CONCURRENCY)
+    pending = [asyncio.create_task(_delete_stale_posts(channel, [m for m, _ in stale], sem))]
+    pending += [asyncio.create_task(_ensure_reactions(m, sem)) for m, _ in live if not m.components]
+
+    # 4) Render all missing days up front, then post them.
+    #    Sends stay sequential so the channel still reads Sun → Sat;
+    #    reactions for each post overlap with the next send.
+    for date_str in missing:
+        state.fireteams.setdefault(date_str, {})
+    use_buttons  = SIGNUP_MODE == "buttons"
+    descriptions = await asyncio.gather(*(build_raid_message(d, use_buttons) for d in missing))
+
+    for date_str, description in zip(missing, descriptions):
+        embed = discord.Embed(
+            title=EVENT_TITLE,
+            description=description,
+            color=EMBED_COLOR
+        )
+        embed.add_field(name="Date", value=date_str, inline=False)
+
+        await state.post_limiter.wait()
+        with span("post raid", "rest", date=date_str):
+            if use_buttons:
+                msg = await channel.send(embed=embed, view=RaidSignupView())
+            else:
+                msg = await channel.send(embed=embed)
+        if not use_buttons:
+            pending.append(asyncio.create_task(_ensure_reactions(msg, sem)))
+        state.previous_week_messages.append(msg.id)
+        logging.info("Posted raid for %s as message %s", date_str, msg.id)
+
+    for result in await asyncio.gather(*pending, return_exceptions=True):
+        if isinstance(result, Exception):
+            logging.error("Rotation step failed: %s", result)
+
+    # 5) Persist fireteams/waitlists
+    state.save_raids()
+    logging.info(
+        "Weekly posts rotated in %.2fs (%d posted, %d removed, %d kept)",
+        time.monotonic() - started, len(missing), len(stale), len(live)
+    )
+
+# —————————————————————————————————————————
+# Reaction Handling: ✅ join / ❌ leave
+# —————————————————————————————————————————
+
+def waitlist(date_str: str) -> Waitlist:
+    queue = state.waitlists.get(date_str)
+    if queue is None:
+        queue = state.waitlists[date_str] = Waitlist()
+    return queue
+
+def waitlist_tier(uid: int) -> int:
+    # Lower tiers are promoted first; ties go to whoever signed up earlier
+    if WAITLIST_PRIORITY == "attendance":
+        return -(state.attendance.attended(uid) // 5)   # bands of 5 raids played
+    if WAITLIST_PRIORITY == "badges":
+        rec = state.users.get(uid)
+        return -bin(rec.badges).count("1") if rec else 0
+    return 0
+
+def signed_up(date_str: str) -> set[int]:
+    return set(state.fireteams.get(date_str, {}).values()) | set(state.waitlists.get(date_str, ()))
+
+def assign_slot(member, date_str: str, guild, backup_only: bool = False) -> str:
+    """
+    Places member in the first free fireteam slot, falling back to the waitlist.
+    Returns "fireteam", "backup" or "already" (no overwrite).
+    """
+    team  = state.fireteams.setdefault(date_str, {})
+    queue = waitlist(date_str)
+
+    already = member.id in team.values() or member.id in queue
+
+    # ─── Prevent hijack if overwrite not allowed ───
+    if already and not ALLOW_OVERWRITE:
+        return "already"
+
+    # ─── Clear their old slot if overwrite is allowed ───
+    if already and ALLOW_OVERWRITE:
+        for slot, uid in list(team.items()):
+            if uid == member.id:
+                team.pop(slot)
+                log_slot_change("Cleared old", member, date_str, slot)
+        queue.remove(member.id)
+
+    # ─── Try to fill a fireteam slot ───
+    if not backup_only:
+        for slot in range(FIRETEAM_SIZE):
+            prev_id = team.get(slot)
+            if prev_id is None or prev_id == member.id:
+                team[slot] = member.id
+
+                if prev_id and prev_id != member.id:
+                    prev_user = guild.get_member(prev_id)
+                    log_slot_change(
+                        "Overwritten", member, date_str, slot, prev_user
+                    )
+                else:
+                    log_slot_change("Assigned", member, date_str, slot)
+                return "fireteam"
+
+    # ─── Fireteam full (or backup requested): join the waitlist ───
+    queue.add(member.id, waitlist_tier(member.id))
+    slot_log.info(
+        "[SLOT CHANGE] Waitlisted: %s on %s (%d waiting)", member.display_name, date_str, len(queue)
+    )
+    return "backup"
+
+def promote_waitlist(date_str: str, guild) -> list[int]:
+    """
+    Fills every open fireteam slot from the head of the waitlist, so several
+    slots freed at once cascade in one go. Returns the promoted uids.
+    """
+    team  = state.fireteams.setdefault(date_str, {})
+    queue = waitlist(date_str)
+    promoted: list[int] = []
+    for slot in [s for s in range(FIRETEAM_SIZE) if s not in team]:
+        uid = queue.pop()
+        if uid is None:
+            break
+        team[slot] = uid
+        state.recent_changes[uid] = "joined"
+        state.promoted.setdefault(date_str, set()).add(uid)
+        promoted.append(uid)
+
+        # Log by display name (cache only — no REST under the lock)
+        name = peek_display_name(uid, guild)
+        state.raid_log.setdefault(date_str, []).append(
+            f"✅ Promoted {name} to fireteam slot {slot + 1} from the waitlist"
+        )
+    return promoted
+
+def release_slot(member, date_str: str, guild) -> tuple[bool, list[int]]:
+    """
+    Removes member from the fireteam or waitlist and refills the fireteam.
+    Returns (removed, promoted uids).
+    """
+    team = state.fireteams.setdefault(date_str, {})
+    log  = state.raid_log.setdefault(date_str, [])
+
+    removed = False
+
+    # ─── Remove member from fireteam ───
+    for slot, uid in list(team.items()):
+        if uid == member.id:
+            del team[slot]
+            removed = True
+            log.append(f"🛑 {member.display_name} removed from fireteam slot {slot + 1}")
+
+    # ─── Remove member from the waitlist ───
+    if waitlist(date_str).remove(member.id):
+        removed = True
+        log.append(f"🛑 {member.display_name} left the waitlist")
+
+    promoted_uids = promote_waitlist(date_str, guild) if removed else []
+
+    if removed:
+        state.promoted.get(date_str, set()).discard(member.id)
+    state.recent_changes[member.id] = "left"
+    return removed, promoted_uids
+
+def reward_signup(member, date_str: str):
+    # raids_joined counts raids, not every re-join of the same raid
+    credited = state.credited.setdefault(date_str, set())
+    if member.id in credited:
+        return
+    credited.add(member.id)
+
+    badge_cog = badges()
+    if badge_cog:
+        badge_cog.reward_signup(member.id, member.display_name)
+
+def reward_promotion(promoted_uid: int, date_str: str):
+    # ─── Notify & badge logic for the promoted user ───
+    dm_outbox.send(
+        promoted_uid,
+        f"You’ve been promoted to the fireteam for {date_str}! 🎉 Get ready to raid."
+    )
+
+    badge_cog = badges()
+    if badge_cog:
+        badge_cog.reward_promotion(promoted_uid)
+
+# —————————————————————————————————————————
+# Button Handling: Join / Leave / Backup
+# —————————————————————————————————————————
+# "reactions" keeps the ✅/❌ flow for new posts; "buttons" posts a persistent view.
+# Either way, existing reaction-based posts keep working.
+SIGNUP_MODE = os.getenv("SIGNUP_MODE", "reactions")
+
+class RaidSignupView(discord.ui.View):
+    # timeout=None + fixed custom_ids → survives restarts once registered via bot.add_view()
+    def __init__(self):
+        super().__init__(timeout=None)
+
+    @discord.ui.button(label="Join", emoji="✅", style=discord.ButtonStyle.success, custom_id="raid:join")
+    async def join(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await handle_button_signup(interaction, "join")
+
+    @discord.ui.button(label="Leave", emoji="❌", style=discord.ButtonStyle.danger, custom_id="raid:leave")
+    async def leave(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await handle_button_signup(interaction, "leave")
+
+    @discord.ui.button(label="Backup", emoji="🛡️", style=discord.ButtonStyle.secondary, custom_id="raid:backup")
+    async def backup(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await handle_button_signup(interaction, "backup")
+
+async def handle_button_signup(interaction: discord.Interaction, action: str):
+    # The interaction already carries member + message, so there is nothing to fetch;
+    # the refreshed lineup goes back by editing the deferred response.
+    # Acknowledge first: the lock wait and rendering can outlast Discord's 3 s window.
+    await interaction.response.defer()
+    member   = interaction.user
+    message  = interaction.message
+    remember_member(member)
+    date_str = extract_date_from_message(message)
+    slot_log.info("BUTTON %s: member=%s date=%s", action, member.display_name, date_str)
+    if not date_str:
+        return await interaction.followup.send("❌ This post has no raid date.", ephemeral=True)
+    if raid_closed(date_str):
+        return await interaction.followup.send(f"🔒 Signups for **{date_str}** are closed.", ephemeral=True)
+
+    # Only in-memory work under the lock; every reply goes out after it is released
+    async with traced_lock(state.slot_lock, "slot_lock"):
+        if action == "leave":
+            removed, promoted_uids = release_slot(member, date_str, interaction.guild)
+            changed = bool(removed)
+            notice  = f"You’ve left the raid on **{date_str}**." if changed else "You're not signed up for this raid."
+        else:
+            promoted_uids = []
+            outcome = assign_slot(member, date_str, interaction.guild, backup_only=(action == "backup"))
+            changed = outcome != "already"
+            if outcome == "already":
+                notice = "You're already signed up. Press Leave first to change your slot."
+            elif outcome == "fireteam":
+                notice = f"✅ You’re confirmed for the raid on **{date_str}** at 20:00 BST!"
+            else:
+                notice = f"🛡️ You’re on the waitlist for **{date_str}** — if a slot opens up, you'll be moved automatically!"
+
+        if changed:
+            if action != "leave":
+                state.recent_changes[member.id] = "joined"
+                reward_signup(member, date_str)
+            for uid in promoted_uids:
+                reward_promotion(uid, date_str)
+            lineup = snapshot_lineup(date_str)
+            state.recent_changes.clear()
+
+    if not changed:
+        return await interaction.followup.send(notice, ephemeral=True)
+
+    # Persist before any network call, so a failed response can't lose the change
+    state.save_users()
+    state.save_raids()
+
+    # Rendering may fetch uncached users over REST, so it happens after the lock is released
+    embed = message.embeds[0]
+    embed.description = await build_raid_message(date_str, buttons=True, snapshot=lineup)
+    try:
+        await interaction.edit_original_response(embed=embed)
+    except discord.HTTPException as e:
+        logging.warning("Button response for %s failed (%s), refreshing the post instead", message.id, e)
+        schedule_update(message.id, date_str)
+    startup.mark("first signup handled")
+    await interaction.followup.send(notice, ephemeral=True)
+
+# —————————————————————————————————————————
+# Per-post reaction queues
+# —————————————————————————————————————————
+# Raw reaction events are queued per post and drained by one worker per post,
+# so a post's events apply in order without a global lock. The worker waits
+# EVENT_COALESCE_WINDOW after the first event, drains what arrived and keeps
+# only each user's last intent: a ✅ toggled off and on again nets to nothing.
+# A full queue makes the gateway listener wait (backpressure).
+EVENT_QUEUE_MAX       = int(os.getenv("EVENT_QUEUE_MAX", "100"))
+EVENT_COALESCE_WINDOW = float(os.getenv("EVENT_COALESCE_WINDOW", "1.0"))
+
+def reaction_intent(payload, added: bool) -> str | None:
+    # Losing ✅ or adding ❌ always leaves. Adding ✅ or dropping ❌ only joins if the
+    # post then passes signup_reactors(), which the batch checks before applying it.
+    emoji = str(payload.emoji)
+    if emoji == "✅":
+        return "join" if added else "leave"
+    if emoji == "❌":
+        return "leave" if added else "join"
+    return None
+
+def notify_signup(uid: int, date_str: str, outcome: str):
+    # DMs for a reaction signup, whether seen live or caught up by reconciliation
+    dm_outbox.send(uid, f"✅ You’re confirmed for the raid on **{date_str}** at 20:00 BST!")
+    if outcome == "backup":
+        dm_outbox.send(uid, "You're on the waitlist for now — if a slot opens up, you'll be moved automatically!")
+
+async def enqueue_reaction(payload, added: bool):
+    raw_log.info(
+        "[RAW %s] user=%s msg=%s emoji=%s",
+        "ADD" if added else "REMOVE", payload.user_id, payload.message_id, payload.emoji
+    )
+    # ─── Ignore the bot’s own reactions, other channels and unrelated emoji ───
+    if payload.user_id == state.bot.user.id or payload.channel_id != CHANNEL_ID:
+        return
+    intent = reaction_intent(payload, added)
+    if intent is None:
+        return
+
+    queue = state.post_queues.get(payload.message_id)
+    if queue is None:
+        queue = state.post_queues[payload.message_id] = asyncio.Queue(maxsize=EVENT_QUEUE_MAX)
+    if queue.full():
+        raw_log.warning("Event queue for %s is full, waiting", payload.message_id)
+    await queue.put((payload, intent))
+    # If its worker retired while we waited for room, the queue needs registering again
+    state.post_queues.setdefault(payload.message_id, queue)
+
+    if payload.message_id not in state.post_workers:
+        state.post_workers[payload.message_id] = asyncio.create_task(drain_post_queue(payload.message_id))
+
+async def drain_post_queue(message_id: int):
+    queue = state.post_queues[message_id]
+    try:
+        while not queue.empty():
+            await asyncio.sleep(EVENT_COALESCE_WINDOW)
+            batch = [queue.get_nowait() for _ in range(queue.qsize())]
+            try:
+                with span("reaction batch", "gateway", root=True, message=message_id, events=len(batch)):
+                    await apply_reaction_batch(batch)
+            except Exception:
+                logging.exception("Reaction batch on %s failed", message_id)
+            # Let listeners woken by the drain land their events before checking for more
+            await asyncio.sleep(0)
+    finally:
+        state.post_workers.pop(message_id, None)
+        # Idle posts keep no queue, so memory tracks only posts with events in flight
+        if queue.empty() and state.post_queues.get(message_id) is queue:
+            del state.post_queues[message_id]
+
+async def apply_reaction_batch(batch: list):
+    """
+    Collapses a batch of queued events into each user's net change and applies
+    it as one mutation: one fetch, one lock hold, one save, one embed refresh.
+    """
+    first   = batch[0][0]
+    guild   = state.bot.get_guild(first.guild_id)
+    channel = guild.get_channel(first.channel_id) if guild else None
+    if not channel:
+        return
+    with span("fetch message", "rest"):
+        message = await channel.fetch_message(first.message_id)
+
+    # A reconcile pass running on this post must leave these users to us
+    touched = state.reconcile_touched.get(message.id)
+    if touched is not None:
+        touched.update(payload.user_id for payload, _ in batch)
+
+    date_str = extract_date_from_message(message)
+    if not date_str:
+        logging.info("No date found on msg %s, bailing out", message.id)
+        return
+    if raid_closed(date_str):
+        raw_log.info("Ignoring %d events on %s: raid %s already started", len(batch), message.id, date_str)
+        return
+
+    # ─── 1) Last intent per user wins; order of first event is kept ───
+    net: dict[int, tuple] = {}
+    for payload, intent in batch:
+        net[payload.user_id] = (payload, intent)
+
+    current = signed_up(date_str)
+    joins  = [p for uid, (p, intent) in net.items() if intent == "join" and uid not in current]
+    leaves = [uid for uid, (p, intent) in net.items() if intent == "leave" and uid in current]
+    if joins:
+        # Same rule as reconciliation, so a catch-up pass can't undo what we apply here
+        wanted = await signup_reactors(message)
+        joins  = [p for p in joins if p.user_id in wanted]
+    if not joins and not leaves:
+        raw_log.info("%d events on %s netted to no change", len(batch), message.id)
+        return
+
+    # ─── 2) Resolve members before taking the lock (may hit REST) ───
+    join_members = []
+    for payload in joins:
+        member = payload.member or await get_member(guild, payload.user_id)
+        if member:
+            remember_member(member)
+            join_members.append(member)
+    leave_members = [await get_member(guild, uid) or await get_cached_user(uid) for uid in leaves]
+
+    # ─── 3) Apply leaves first so freed slots promote from the waitlist, then joins ───
+    promoted = False
+    async with traced_lock(state.slot_lock, "slot_lock"):
+        for member in leave_members:
+            _, promoted_uids = release_slot(member, date_str, guild)
+            for uid in promoted_uids:
+                reward_promotion(uid, date_str)
+                promoted = True
+
+        for member in join_members:
+            slot_log.info("HANDLE_SIGNUP: member=%s date=%s", member.display_name, date_str)
+            outcome = assign_slot(member, date_str, guild)
+            if outcome == "already":
+                continue
+            state.recent_changes[member.id] = "joined"
+            notify_signup(member.id, date_str, outcome)
+            reward_signup(member, date_str)
+
+        schedule_update(message.id, date_str)
+
+    startup.mark("first signup handled")
+    if join_members or promoted:
+        state.save_users()
+    state.save_raids()
+
+async def update_raid_message(message_id: int, date_str: str):
+    # give Discord a moment before patching
+    await state.edit_limiter.wait()  
+
+    channel = state.bot.get_channel(CHANNEL_ID)
+    with span("fetch message", "rest"):
+        message = await channel.fetch_message(message_id)
+
+    description = await build_raid_message(date_str, buttons=bool(message.components))
+    embed = message.embeds[0]
+    embed.description = description
+
+    # edit inside a try/except block
+    try:
+        with span("edit embed", "rest"):
+            await message.edit(embed=embed)
+    except discord.HTTPException as e:
+        logging.warning("Failed to edit raid message %s: %s", message_id, e)
+
+    # clear visual‐flag markers
+    state.recent_changes.clear()
+
+# —————————————————————————————————————————
+# Reminder Loop: 1 hour before each raid
+# —————————————————————————————————————————
+async def reminder_loop():
+    await state.bot.wait_until_ready()
+    tz = pytz.timezone("Europe/London")
+
+    while not state.bot.is_closed():
+        now = datetime.now(tz)
+        for date_str, team in state.fireteams.items():
+            if state.reminder_sent.get(date_str):
+                continue  # Skip if already sent
+
+            try:
+                raid_dt = datetime.strptime(date_str, "%A, %d %B")
+                raid_dt = raid_dt.replace(year=now.year, hour=20, minute=0)
+                raid_dt = tz.localize(raid_dt)
+                if raid_dt < now:
+                    raid_dt = raid_dt.replace(year=now.year + 1)
+            except ValueError:
+                continue
+
+            delta_minutes = (raid_dt - now).total_seconds() / 60
+            reminder_log.debug("Now: %s, Raid: %s, Delta: %.2f minutes", now, raid_dt, delta_minutes)
+
+            if 59.5 <= delta_minutes <= 60.5:
+                channel = state.bot.get_channel(CHANNEL_ID)
+                event_name = "the raid"
+                async for m in channel.history(limit=200):
+                    if m.author == state.bot.user and date_str in m.content:
+                        for line in m.content.splitlines():
+                            if line.startswith("🔥 **CLAN RAID EVENT:"):
+                                event_name = line.split("CLAN RAID EVENT:", 1)[1].strip(" 🔥*")
+                                break
+                        break
+
+                # Fireteam plus the head of the waitlist, the people most likely to play
+                local_members = list(team.values()) + waitlist(date_str).top(WAITLIST_SHOWN)
+                for uid in local_members:
+                    rec = state.users.get(uid)
+                    try:
+                        user_tz = pytz.timezone(rec.tz if rec and rec.tz else "Europe/London")
+                    except pytz.UnknownTimeZoneError:
+                        user_tz = tz
+                    event_time_str = raid_dt.astimezone(user_tz).strftime('%H:%M %Z')
+
+                    dm_outbox.send(
+                        uid,
+                        f"⏰ **One hour to glory!**\n"
+                        f"🔥 The **{event_name}** kicks off on **{date_str}** at **{event_time_str}**.\n"
+                        f"🛡️ Gear up, rally your fireteam, and be ready to make history!"
+                    )
+
+                state.reminder_sent[date_str] = True  # Mark as sent
+        await asyncio.sleep(60)
+
+# —————————————————————————————————————————
+# Reconciliation: catch up on reactions missed while disconnected
+# —————————————————————————————————————————
+RECONCILE_CONCURRENCY = 4   # max posts whose reactors are fetched at once
+
+async def _fetch_reactors(message: discord.Message, emoji: str) -> list:
+    reaction = discord.utils.get(message.reactions, emoji=emoji)
+    if not reaction or reaction.count - reaction.me == 0:
+        return []
+    with span("fetch reactors", "rest", emoji=emoji):
+        return [u async for u in reaction.users() if u.id != state.bot.user.id]
+
+async def signup_reactors(message: discord.Message) -> dict[int, discord.abc.User]:
+    # The signup rule, for live events and reconciliation alike: a user wants a slot
+    # while their ✅ is on the post and their ❌ is not ("can't make it" wins).
+    joined = await _fetch_reactors(message, "✅")
+    left   = {u.id for u in await _fetch_reactors(message, "❌")}
+    return {u.id: u for u in joined if u.id not in left}
+
+async def _snapshot_post(message: discord.Message, sem: asyncio.Semaphore):
+    async with sem:
+        return await signup_reactors(message)
+
+async def reconcile_posts(messages: list[discord.Message]):
+    """
+    Pulls the reactor lists for every live reaction-based post in one bounded
+    pass, diffs them against fireteams/waitlists and applies only the joins,
+    leaves and promotions needed, with one embed refresh per changed post.
+    Live reaction batches keep running meanwhile; any user a batch touches
+    after the snapshot starts is left to the batch, whose events are newer.
+    """
+    # One pass at a time: on_resumed can land while the startup catch-up is still reconciling
+    async with state.reconcile_lock:
+        started  = time.monotonic()
+        messages = [
+            m for m in messages
+            if not m.components and extract_date_from_message(m) and not raid_closed(extract_date_from_message(m))
+        ]
+        if not messages:
+            return
+
+        for message in messages:
+            state.reconcile_touched[message.id] = set()
+        try:
+            sem = asyncio.Semaphore(RECONCILE_CONCURRENCY)
+            snapshots = await asyncio.gather(*(_snapshot_post(m, sem) for m in messages), return_exceptions=True)
+
+            # Resolve members for anyone who may be removed before taking the lock (may hit REST)
+            posts = []
+            resolved: dict[int, object] = {}
+            for message, wanted in zip(messages, snapshots):
+                if isinstance(wanted, Exception):
+                    logging.warning("Could not read reactions on %s: %s", message.id, wanted)
+                    continue
+                date_str = extract_date_from_message(message)
+                for uid in signed_up(date_str) - wanted.keys() - resolved.keys():
+                    resolved[uid] = await get_member(message.guild, uid) or await get_cached_user(uid)
+                posts.append((message, date_str, wanted))
+
+            totals  = {"joins": 0, "leaves": 0, "promotions": 0}
+            changed = False
+            async with traced_lock(state.slot_lock, "slot_lock"):
+                for message, date_str, wanted in posts:
+                    # Diff against the lineup as it is now, minus users live events have claimed
+                    touched = state.reconcile_touched[message.id]
+                    current = signed_up(date_str)
+                    joins   = [wanted[uid] for uid in wanted.keys() - current - touched]
+                    leaves  = [resolved[uid] for uid in current - wanted.keys() - touched if uid in resolved]
+                    if not joins and not leaves:
+                        continue
+                    changed = True
+
+                    for member in leaves:
+                        removed, promoted_uids = release_slot(member, date_str, message.guild)
+                        totals["leaves"] += removed
+                        for uid in promoted_uids:
+                            reward_promotion(uid, date_str)
+                        totals["promotions"] += len(promoted_uids)
+                    for member in joins:
+                        outcome = assign_slot(member, date_str, message.guild)
+                        if outcome in ("fireteam", "backup"):
+                            state.recent_changes[member.id] = "joined"
+                            notify_signup(member.id, date_str, outcome)
+                            reward_signup(member, date_str)
+                            totals["joins"] += 1
+                    schedule_update(message.id, date_str)
+        finally:
+            for message in messages:
+                state.reconcile_touched.pop(message.id, None)
+
+        if changed:
+            state.save_users()
+            state.save_raids()
+        logging.info(
+            "Reconciled %d posts in %.2fs: %d joins, %d leaves, %d promotions",
+            len(messages), time.monotonic() - started,
+            totals["joins"], totals["leaves"], totals["promotions"]
+        )
+
+async def reconcile_live_posts():
+    channel = state.bot.get_channel(CHANNEL_ID)
+    if not channel:
+        return
+    sem = asyncio.Semaphore(RECONCILE_CONCURRENCY)
+
+    async def _fetch(message_id: int):
+        async with sem:
+            try:
+                return await channel.fetch_message(message_id)
+            except discord.NotFound:
+                return None
+
+    fetched = await asyncio.gather(*(_fetch(mid) for mid in state.previous_week_messages), return_exceptions=True)
+    # Posts for raids that already started stay up until Sunday, but are no longer live
+    live = [
+        m for m in fetched
+        if isinstance(m, discord.Message) and not raid_closed(extract_date_from_message(m) or "")
+    ]
+    state.previous_week_messages[:] = [m.id for m in live]
+    await reconcile_posts(live)
+
+# —————————————————————————————————————————
+# Attendance & archival: record each raid once it starts, archive it once it's old
+# —————————————————————————————————————————
+def raid_datetime_in(date_str: str, year: int, tz) -> datetime | None:
+    # None unless the weekday in the key falls on that date in `year`
+    try:
+        raid_dt = datetime.strptime(f"{date_str} {year}", "%A, %d %B %Y")
+    except ValueError:
+        return None
+    if raid_dt.strftime("%A, %d %B") != date_str:
+        return None
+    return tz.localize(raid_dt.replace(hour=20, minute=0))
+
+def raid_closed(date_str: str) -> bool:
+    """
+    Signups close when the raid starts. From then on the lineup belongs to the
+    attendance record and the archive, so late reactions, button presses and
+    reconciles must not change it (or re-credit raids_joined).
+    """
+    tz  = pytz.timezone("Europe/London")
+    now = datetime.now(tz)
+    raid_dt = past_raid_datetime(date_str, now, tz) or stale_raid_datetime(date_str, now, tz)
+    return raid_dt is not None and raid_dt <= now
+
+def past_raid_datetime(date_str: str, now: datetime, tz) -> datetime | None:
+    """
+    Post dates carry no year, but the weekday pins it down: a given day and
+    month falls on the same weekday at most once in any three years.
+    Returns None for keys that match no year around now.
+    """
+    for year in (now.year, now.year - 1, now.year + 1):
+        raid_dt = raid_datetime_in(date_str, year, tz)
+        if raid_dt:
+            return raid_dt
+    return None
+
+def stale_raid_datetime(date_str: str, now: datetime, tz) -> datetime | None:
+    # Lineups left over from older years: the latest earlier year the weekday fits
+    for year in range(now.year - 2, now.year - 14, -1):
+        raid_dt = raid_datetime_in(date_str, year, tz)
+        if raid_dt:
+            return raid_dt
+    return None
+
+# Hot state only holds raids that haven't finished long ago; the rest moves to the archive
+ARCHIVE_AFTER = timedelta(hours=float(os.getenv("ARCHIVE_AFTER_HOURS", "24")))
+
+def archive_finished_raids(now: datetime, tz) -> int:
+    """
+    Moves every raid that started more than ARCHIVE_AFTER ago out of the hot
+    dicts and into the append-only archive. Returns how many were moved.
+    """
+    dates = (
+        state.fireteams.keys() | state.waitlists.keys() | state.raid_log.keys()
+        | state.reminder_sent.keys() | state.promoted.keys() | state.credited.keys()
+    )
+    archived = 0
+    for date_str in dates:
+        # Keys from years ago never become attendance, but still leave hot state
+        raid_dt = past_raid_datetime(date_str, now, tz) or stale_raid_datetime(date_str, now, tz)
+        if raid_dt is None or now - raid_dt < ARCHIVE_AFTER:
+            continue
+        date_key = raid_dt.strftime("%Y-%m-%d")
+        queue = state.waitlists.pop(date_str, None)
+        if date_key in raid_archive:
+            # Already archived: the first record is the real lineup, never replace it
+            leftover = state.fireteams.pop(date_str, {})
+            if leftover or queue:
+                logging.warning("Dropping hot entries for already-archived raid %s: %s", date_key, leftover)
+            for store in (state.promoted, state.raid_log, state.reminder_sent, state.credited):
+                store.pop(date_str, None)
+            continue
+        raid_archive.append(date_key, {
+            "date":     date_str,
+            "fireteam": state.fireteams.pop(date_str, {}),
+            "waitlist": [row[0] for row in queue.to_list()] if queue else [],
+            "promoted": sorted(state.promoted.pop(date_str, ())),
+            "log":      state.raid_log.pop(date_str, []),
+        })
+        state.reminder_sent.pop(date_str, None)
+        state.credited.pop(date_str, None)
+        archived += 1
+    return archived
+
+@tasks.loop(minutes=5)
+async def record_finished_raids():
+    tz  = pytz.timezone("Europe/London")
+    now = datetime.now(tz)
+    finished = []
+    for date_str, team in state.fireteams.items():
+        raid_dt = past_raid_datetime(date_str, now, tz)
+        if raid_dt is None or raid_dt > now:
+            continue
+        date_key = raid_dt.strftime("%Y-%m-%d")
+        if not state.attendance.has(date_key):
+            finished.append((date_key, date_str, list(team.values())))
+
+    if finished:
+        badge_cog = badges()
+        for date_key, date_str, attendees in sorted(finished):
+            if state.attendance.record_raid(date_key, attendees, state.promoted.get(date_str, ())):
+                logging.info("Recorded attendance for %s (%d raiders)", date_key, len(attendees))
+                if badge_cog:
+                    for uid in attendees:
+                        badge_cog.reward_attendance(uid)
+
+        state.save_attendance()
+        state.save_users()
+
+    # Attendance is recorded at raid time, well before ARCHIVE_AFTER runs out
+    archived = archive_finished_raids(now, tz)
+    if archived:
+        logging.info("Archived %d finished raids; %d dates still hot", archived, len(state.fireteams))
+        state.save_raids()
+
+@record_finished_raids.before_loop
+async def _before_record_finished_raids():
+    await state.bot.wait_until_ready()
+
+# —————————————————————————————————————————
+# Deferred catch-up after (re)connecting
+# —————————————————————————————————————————
+# Reactions are served as soon as the gateway is ready; the rotation backfill
+# and reconciliation pass wait CATCHUP_DELAY seconds so they don't compete
+# with the first events for the REST budget.
+CATCHUP_DELAY = float(os.getenv("CATCHUP_DELAY", "5"))
+
+async def deferred_catchup():
+    await asyncio.sleep(CATCHUP_DELAY)
+    try:
+        # On cold start, backfill any existing posts
+        if not state.previous_week_messages:
+            logging.info("No existing raid posts found on startup – posting initial week block.")
+            await schedule_weekly_posts_function()
+            startup.mark("rotation done")
+        await reconcile_live_posts()
+        startup.mark("reconcile done")
+    except Exception:
+        logging.exception("Startup catch-up failed")
+    logging.info("Startup timings: %s", startup.report())
+
+# —————————————————————————————————————————
+# Cog: wires the module functions above into the bot
+# —————————————————————————————————————————
+class Raids(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.signup_view: RaidSignupView | None = None
+        self.reminder_task: asyncio.Task | None = None
+        self.catchup_task: asyncio.Task | None = None
+
+    async def cog_load(self):
+        # Re-attach button callbacks to posts made before this restart/reload
+        self.signup_view = RaidSignupView()
+        self.bot.add_view(self.signup_view)
+        if not sunday_scheduler.is_running():
+            sunday_scheduler.start()
+        if not record_finished_raids.is_running():
+            record_finished_raids.start()
+        self.reminder_task = asyncio.create_task(reminder_loop())
+
+    async def cog_unload(self):
+        # Old loops must stop before the reloaded module starts its own
+        sunday_scheduler.cancel()
+        record_finished_raids.cancel()
+        if self.reminder_task:
+            self.reminder_task.cancel()
+        if self.signup_view:
+            self.signup_view.stop()
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # on_ready can fire again after a reconnect; never run two catch-ups at once
+        if self.catchup_task and not self.catchup_task.done():
+            return
+        self.catchup_task = asyncio.create_task(deferred_catchup())
+
+    @commands.Cog.listener()
+    async def on_resumed(self):
+        logging.info("Session RESUMED → checking for missing raid posts")
+        channel = self.bot.get_channel(CHANNEL_ID)
+        if channel:
+            upcoming = upcoming_dates(datetime.now(pytz.timezone("Europe/London")))
+            live = [m for m, date_val in await find_raid_posts(channel) if date_val in upcoming]
+            state.previous_week_messages[:] = [m.id for m in live]
+            if not state.previous_week_messages:
+                logging.info("No raid posts found on resume → posting week block now")
+                await schedule_weekly_posts_function()
+            else:
+                await reconcile_posts(live)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload):
+        await enqueue_reaction(payload, added=True)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_remove(self, payload):
+        await enqueue_reaction(payload, added=False)
+
+    @commands.command(name="showlineup")
+    async def show_lineup(self, ctx, *, date_str: str):
+        if date_str not in state.fireteams and date_str not in state.waitlists:
+            await ctx.send(f"No lineup found for **{date_str}**.")
+            return
+
+        lines = [f"**Lineup for {date_str}:**"]
+
+        # Fireteam slots
+        for i in range(FIRETEAM_SIZE):
+            uid = state.fireteams.get(date_str, {}).get(i)
+            if not uid:
+                lines.append(f"{i+1}. Empty Slot")
+                continue
+
+            try:
+                user = await get_cached_user(uid)
+            except Exception as e:
+                logging.warning("Could not fetch user %s for show_lineup: %s", uid, e)
+                lines.append(f"{i+1}. Unknown User")
+                continue
+
+            lines.append(f"{i+1}. {user.display_name}")
+
+        # Waitlist, head first
+        queue = waitlist(date_str)
+        for i, uid in enumerate(queue.top(WAITLIST_SHOWN)):
+            try:
+                user = await get_cached_user(uid)
+            except Exception as e:
+                logging.warning("Could not fetch backup user %s: %s", uid, e)
+                lines.append(f"Backup {i+1}: Unknown User")
+                continue
+
+            lines.append(f"Backup {i+1}: {user.display_name}")
+        if len(queue) > WAITLIST_SHOWN:
+            lines.append(f"…and {len(queue) - WAITLIST_SHOWN} more on the waitlist")
+
+        # Send once, after building all lines
+        await ctx.send("\n".join(lines))
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Raids(bot))
@@ -0,0 +1,80 @@
+import asyncio
+import discord
+from discord.ext import commands
+
+from core.state import state
+from core.archive import raid_archive
+
+class Stats(commands.Cog):
+    """Attendance analytics, served from the precomputed history indexes and the raid archive."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @commands.command(name="raidstats")
+    async def raidstats(self, ctx, member: discord.Member = None):
+        member = member or ctx.author
+        history, uid = state.attendance, member.id
+        if not history.attended(uid):
+            return await ctx.send(f"No recorded raids for **{member.display_name}** yet.")
+
+        await ctx.send(
+            f"📊 **Raid stats for {member.display_name}**\n"
+            f"⚔️ Raids played: **{history.attended(uid)}** of {len(history.dates)} recorded\n"
+            f"🔥 Current streak: **{history.current_streak(uid)}** · Longest: **{history.longest_streak(uid)}**\n"
+            f"🛡️ Played after promotion: **{history.promotions(uid)}**\n"
+            f"📈 Reliability: **{history.reliability(uid):.0%}**"
+        )
+
+    @commands.command(name="reliable")
+    async def reliable(self, ctx, top: int = 5):
+        history = state.attendance
+        # Rank by share of raids attended, then by volume so one-off raiders don't top the list
+        ranked = sorted(
+            history.users,
+            key=lambda uid: (history.reliability(uid), history.attended(uid)),
+            reverse=True
+        )[:max(1, min(top, 20))]
+        if not ranked:
+            return await ctx.send("No raids recorded yet.")
+
+        lines = ["🏅 **Most Reliable Raiders** 🏅"]
+        for i, uid in enumerate(ranked, start=1):
+            member = ctx.guild.get_member(uid) if ctx.guild else None
+            name = member.display_name if member else f"<@{uid}>"
+            lines.append(
+                f"{i}. {name} — {history.reliability(uid):.0%} "
+                f"({history.attended(uid)} raids, streak {history.current_streak(uid)})"
+            )
+        await ctx.send("\n".join(lines))
+
+    @commands.command(name="raidhistory")
+    async def raidhistory(self, ctx, which: str = "5"):
+        # `!raidhistory 10` lists the last 10 archived raids; `!raidhistory 2026-10-12` shows one
+        def name(uid):
+            member = ctx.guild.get_member(uid) if ctx.guild else None
+            return member.display_name if member else f"<@{uid}>"
+
+        if which.isdigit():
+            records = await asyncio.to_thread(raid_archive.recent, max(1, min(int(which), 20)))
+            if not records:
+                return await ctx.send("No archived raids yet.")
+            lines = ["📜 **Past Raids** 📜"]
+            for record in records:
+                lines.append(f"• **{record['date']}** — {len(record['fireteam'])} raiders, {len(record['waitlist'])} waiting")
+            return await ctx.send("\n".join(lines))
+
+        record = await asyncio.to_thread(raid_archive.get, which)
+        if not record:
+            return await ctx.send(f"No archived raid on **{which}**. Use `YYYY-MM-DD`.")
+        lines = [f"📜 **{record['date']}**"]
+        for slot, uid in sorted(record["fireteam"].items(), key=lambda x: int(x[0])):
+            mark = " 🛡️" if uid in record["promoted"] else ""
+            lines.append(f"{int(slot) + 1}. {name(uid)}{mark}")
+        if record["waitlist"]:
+            lines.append(f"Waitlist: {', '.join(name(uid) for uid in record['waitlist'][:10])}")
+        lines.extend(record["log"][-10:])
+        await ctx.send("\n".join(lines)[:2000])
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Stats(bot))
@@ -0,0 +1,41 @@
+import pytz
+from discord.ext import commands
+
+from core.state import state
+
+class Timezones(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @commands.command()
+    async def settimezone(self, ctx, *, tz_name: str = None):
+        if not tz_name:
+            return await ctx.send("❌ Usage: `!settimezone <Region/City>`")
+
+        # Strip <>, replace spaces with slash, normalize casing
+        cleaned   = tz_name.strip("<>").replace(" ", "/")
+        region, _, city = cleaned.partition("/")
+        tz_clean  = f"{region.capitalize()}/{city.title()}" if city else cleaned.title()
+
+        try:
+            # Validate against pytz
+            pytz.timezone(tz_clean)
+            state.users.set_tz(state.users.record(ctx.author.id), tz_clean)
+            state.save_users()
+            await ctx.send(f"✅ Timezone set to `{tz_clean}`.")
+        except pytz.UnknownTimeZoneError:
+            await ctx.send(
+                "❌ Invalid timezone—try `Europe/Paris` or `America/New_York`."
+            )
+
+    @commands.command()
+    async def mytimezone(self, ctx):
+        rec = state.users.get(ctx.author.id)
+        tz  = rec.tz if rec else None
+        if tz:
+            await ctx.send(f"🕒 Your timezone is set to `{tz}`.")
+        else:
+            await ctx.send("🌍 You haven’t set a timezone yet. Use `!settimezone <Region/City>` to set one.")
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Timezones(bot))
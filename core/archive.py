@@ -0,0 +1,109 @@
+import os
+import json
+import mmap
+import zlib
+import struct
+import logging
+import threading
+
+# ─────────────────────────────────────────────────────
+# Cold tier: finished raids in append-only, compressed segments
+# ─────────────────────────────────────────────────────
+# One segment file per year (archive/raids-2026.seg). Each record is a fixed
+# header (ISO date, blob length) followed by a zlib-compressed JSON blob, so the
+# index can be rebuilt by hopping from header to header through an mmap without
+# decompressing anything. Records are never rewritten; a write torn by a crash
+# is cut off before the next append, so it can't swallow later records.
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")
+
+_HEADER = struct.Struct("<10sI")   # b"2026-10-19", blob length
+
+class RaidArchive:
+    def __init__(self, directory: str):
+        self.directory = directory
+        # date_key → (segment path, blob offset, blob length); built on first read
+        self.index: dict[str, tuple[str, int, int]] | None = None
+        self.ends: dict[str, int] = {}   # segment path → end of its last whole record
+        # History commands build the index in a worker thread while appends run on the loop
+        self.lock = threading.Lock()
+
+    def _segment(self, date_key: str) -> str:
+        return os.path.join(self.directory, f"raids-{date_key[:4]}.seg")
+
+    def _scan(self, path: str) -> tuple[dict[str, tuple[str, int, int]], int]:
+        # Hops from header to header; returns the records and where the last whole one ends
+        records, pos = {}, 0
+        size = os.path.getsize(path)
+        if not size:
+            return records, 0
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            while pos + _HEADER.size <= size:
+                key, length = _HEADER.unpack_from(m, pos)
+                start = pos + _HEADER.size
+                if start + length > size:
+                    break
+                try:
+                    records[key.decode("ascii")] = (path, start, length)
+                except UnicodeDecodeError:
+                    break
+                pos = start + length
+        if pos < size:
+            logging.warning("Archive %s has %d bytes of torn tail at offset %d", path, size - pos, pos)
+        return records, pos
+
+    def append(self, date_key: str, record: dict):
+        blob = zlib.compress(json.dumps(record, separators=(",", ":")).encode(), 9)
+        with self.lock:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._segment(date_key)
+            exists = os.path.exists(path)
+            end = self.ends.get(path)
+            if end is None:
+                end = self._scan(path)[1] if exists else 0
+            with open(path, "r+b" if exists else "wb") as f:
+                if f.seek(0, os.SEEK_END) > end:
+                    logging.warning("Truncating torn tail of %s at offset %d", path, end)
+                    f.truncate(end)
+                f.seek(end)
+                f.write(_HEADER.pack(date_key.encode(), len(blob)) + blob)
+            self.ends[path] = end + _HEADER.size + len(blob)
+            if self.index is not None:
+                self.index[date_key] = (path, end + _HEADER.size, len(blob))
+
+    def _load_index(self) -> dict[str, tuple[str, int, int]]:
+        with self.lock:
+            if self.index is None:
+                index = {}
+                names = sorted(os.listdir(self.directory)) if os.path.isdir(self.directory) else []
+                for name in names:
+                    if name.endswith(".seg"):
+                        path = os.path.join(self.directory, name)
+                        records, self.ends[path] = self._scan(path)
+                        index.update(records)
+                self.index = index
+            return self.index
+
+    def dates(self) -> list[str]:
+        return sorted(self._load_index())
+
+    def __contains__(self, date_key: str) -> bool:
+        return date_key in self._load_index()
+
+    def get(self, date_key: str) -> dict | None:
+        entry = self._load_index().get(date_key)
+        if entry is None:
+            return None
+        path, offset, length = entry
+        try:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                return json.loads(zlib.decompress(m[offset:offset + length]))
+        except (OSError, zlib.error, ValueError) as e:
+            logging.error("Archived raid %s in %s is unreadable: %s", date_key, path, e)
+            return None
+
+    def recent(self, n: int) -> list[dict]:
+        # Newest first; only the requested records are decompressed, unreadable ones are skipped
+        records = (self.get(d) for d in reversed(self.dates()[-n:]))
+        return [r for r in records if r]
+
+raid_archive = RaidArchive(ARCHIVE_DIR)
@@ -0,0 +1,106 @@
+import logging
+
+# ─────────────────────────────────────────────────────
+# Attendance history: one column per finished raid, one bitset row per user
+# ─────────────────────────────────────────────────────
+# Bit i of a user's row is set if they were in the fireteam for dates[i].
+# Streaks, counts and first/last attendance are kept up to date as each raid
+# is recorded, so per-user queries never rescan the history.
+
+class UserAttendance:
+    __slots__ = ("bits", "attended", "promoted", "current", "longest", "first", "last")
+
+    def __init__(self, bits=0, attended=0, promoted=0, current=0, longest=0, first=-1, last=-1):
+        self.bits     = bits       # int bitset over raid columns
+        self.attended = attended   # raids actually played
+        self.promoted = promoted   # raids played after being promoted from backup
+        self.current  = current    # streak ending at `last`
+        self.longest  = longest
+        self.first    = first      # first / last column attended (-1 = never)
+        self.last     = last
+
+class AttendanceHistory:
+    def __init__(self):
+        self.dates: list[str] = []                 # ISO dates, ascending
+        self.index: dict[str, int] = {}            # date → column
+        self.users: dict[int, UserAttendance] = {}
+
+    def has(self, date_key: str) -> bool:
+        return date_key in self.index
+
+    def record_raid(self, date_key: str, attendees, promoted=()) -> bool:
+        """
+        Appends one finished raid. Columns are append-only, so a date older
+        than the latest recorded one is refused.
+        """
+        if date_key in self.index or (self.dates and date_key < self.dates[-1]):
+            logging.debug("Attendance: skipping %s (already recorded or out of order)", date_key)
+            return False
+
+        col = len(self.dates)
+        self.dates.append(date_key)
+        self.index[date_key] = col
+
+        promoted = set(promoted)
+        for uid in set(attendees):
+            rec = self.users.get(uid)
+            if rec is None:
+                rec = self.users[uid] = UserAttendance(first=col)
+            rec.bits     |= 1 << col
+            rec.attended += 1
+            rec.current   = rec.current + 1 if rec.last == col - 1 else 1
+            rec.longest   = max(rec.longest, rec.current)
+            rec.last      = col
+            if uid in promoted:
+                rec.promoted += 1
+        return True
+
+    # ─── O(1) per-user queries ───
+    def current_streak(self, uid: int) -> int:
+        rec = self.users.get(uid)
+        # A streak only counts if it runs up to the most recent raid
+        return rec.current if rec and rec.last == len(self.dates) - 1 else 0
+
+    def longest_streak(self, uid: int) -> int:
+        rec = self.users.get(uid)
+        return rec.longest if rec else 0
+
+    def attended(self, uid: int) -> int:
+        rec = self.users.get(uid)
+        return rec.attended if rec else 0
+
+    def promotions(self, uid: int) -> int:
+        rec = self.users.get(uid)
+        return rec.promoted if rec else 0
+
+    def reliability(self, uid: int) -> float:
+        # Share of raids attended since the user's first one
+        rec = self.users.get(uid)
+        if not rec or rec.first < 0:
+            return 0.0
+        return rec.attended / (len(self.dates) - rec.first)
+
+    def attended_on(self, uid: int, date_key: str) -> bool:
+        rec, col = self.users.get(uid), self.index.get(date_key)
+        return bool(rec and col is not None and rec.bits >> col & 1)
+
+    # ─── Persistence ───
+    def to_dict(self) -> dict:
+        return {
+            "dates": self.dates,
+            # uid → [bits(hex), attended, promoted, current, longest, first, last]
+            "users": {
+                str(uid): [format(r.bits, "x"), r.attended, r.promoted, r.current, r.longest, r.first, r.last]
+                for uid, r in self.users.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "AttendanceHistory":
+        history = cls()
+        history.dates = list(data.get("dates", []))
+        history.index = {d: i for i, d in enumerate(history.dates)}
+        for uid, row in data.get("users", {}).items():
+            bits, *rest = row
+            history.users[int(uid)] = UserAttendance(int(bits, 16), *rest)
+        return history
@@ -0,0 +1,107 @@
+import os
+import json
+import copy
+import queue
+import random
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+
+# ─────────────────────────────────────────────────────
+# Logging pipeline: queue → background writer thread
+# ─────────────────────────────────────────────────────
+LOG_FILE         = "slot_changes.log"
+LOG_JSON         = os.getenv("LOG_JSON", "0") == "1"         # one JSON object per line
+LOG_ROTATE_WHEN  = os.getenv("LOG_ROTATE_WHEN", "")          # e.g. "midnight"; empty → size-based
+LOG_MAX_BYTES    = int(os.getenv("LOG_MAX_BYTES", str(5 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+LOG_SAMPLE       = os.getenv("LOG_SAMPLE", "")               # e.g. "raid.raw=0.1,raid.reminder=0"
+
+# Per-category loggers so noisy paths can be sampled independently
+raw_log      = logging.getLogger("raid.raw")        # [RAW ADD] / [RAW_REMOVE] gateway traces
+slot_log     = logging.getLogger("raid.slots")      # HANDLE_SIGNUP / [SLOT CHANGE]
+reminder_log = logging.getLogger("raid.reminder")   # reminder loop ticks
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts":       self.formatTime(record),
+            "level":    record.levelname,
+            "category": record.name,
+            "msg":      record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a fraction of INFO/DEBUG records per logger category.
+    Warnings and errors always pass.
+    """
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        name = record.name
+        while name:
+            if name in self.rates:
+                return random.random() < self.rates[name]
+            name = name.rpartition(".")[0]
+        return True
+
+def parse_sample_rates(spec: str) -> tuple[dict[str, float], list[str]]:
+    # Returns (rates, bad entries); bad ones are logged once the pipeline is up
+    rates, bad = {}, []
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, rate = part.partition("=")
+        try:
+            rates[name.strip()] = max(0.0, min(1.0, float(rate)))
+        except ValueError:
+            bad.append(part)
+    return rates, bad
+
+class DeferredQueueHandler(QueueHandler):
+    # The stock QueueHandler fully formats on the caller's thread; here we only
+    # merge msg % args and leave timestamps/JSON/tracebacks to the writer thread.
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg  = record.getMessage()
+        record.args = None
+        return record
+
+def setup_logging() -> QueueListener:
+    # Clear any existing handlers (if you re-run or reload)
+    for h in list(logging.root.handlers):
+        logging.root.removeHandler(h)
+
+    if LOG_ROTATE_WHEN:
+        file_handler = TimedRotatingFileHandler(
+            LOG_FILE, when=LOG_ROTATE_WHEN, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+        )
+    else:
+        file_handler = RotatingFileHandler(
+            LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+        )
+    console_handler = logging.StreamHandler()
+
+    formatter = JsonFormatter() if LOG_JSON else logging.Formatter("%(asctime)s %(levelname)s %(message)s")
+    file_handler.setFormatter(formatter)
+    console_handler.setFormatter(formatter)
+
+    # The event loop only enqueues; disk and console writes happen on the listener thread
+    log_queue     = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    rates, bad_rates = parse_sample_rates(LOG_SAMPLE)
+    queue_handler.addFilter(SamplingFilter(rates))
+    logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
+
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    for part in bad_rates:
+        logging.warning("Ignoring bad LOG_SAMPLE entry: %r", part)
+    return listener
@@ -0,0 +1,135 @@
+import time
+import json
+import asyncio
+import logging
+import discord
+
+from core.state import state
+from core.users import get_cached_user
+from core.tracing import traced
+
+# —————————————————————————————————————————
+# DM Outbox: queued, merged & retried user notifications
+# —————————————————————————————————————————
+OUTBOX_FILE      = "dm_outbox.json"
+DM_MERGE_WINDOW  = 2.0    # seconds to collect further messages for the same user
+DM_WORKERS       = 2
+DM_MAX_ATTEMPTS  = 5
+DM_RETRY_BASE    = 5.0    # seconds; doubles with each failed attempt
+DM_MAX_LENGTH    = 2000   # Discord message limit
+
+class DMOutbox:
+    """
+    Notifications are enqueued with send() (pure in-memory, safe under slot_lock)
+    and delivered by background workers. Messages for the same user inside
+    DM_MERGE_WINDOW become one DM; identical lines are dropped; failures retry
+    with backoff; users with closed DMs are remembered and skipped.
+    """
+    def __init__(self, path: str):
+        self.path    = path
+        self.pending: dict[int, dict] = {}   # uid → {"lines": [...], "due": epoch, "attempts": n}
+        self.blocked: set[int] = set()       # users who returned Forbidden
+        self.dirty   = False
+        self.wakeup  = asyncio.Event()
+        self.tasks: list[asyncio.Task] = []
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            self.pending = {int(uid): entry for uid, entry in data.get("pending", {}).items()}
+            self.blocked = {int(uid) for uid in data.get("blocked", [])}
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.pending, self.blocked = {}, set()
+
+    @traced("save dm outbox", "io")
+    def save(self):
+        with open(self.path, "w") as f:
+            json.dump({"pending": self.pending, "blocked": sorted(self.blocked)}, f)
+        self.dirty = False
+
+    def start(self):
+        if self.tasks:
+            return
+        self.tasks = [asyncio.create_task(self._worker()) for _ in range(DM_WORKERS)]
+        self.tasks.append(asyncio.create_task(self._flusher()))
+        self.wakeup.set()
+
+    def send(self, uid: int, text: str):
+        if uid in self.blocked:
+            return
+        entry = self.pending.setdefault(
+            uid, {"lines": [], "due": time.time() + DM_MERGE_WINDOW, "attempts": 0}
+        )
+        if text not in entry["lines"]:
+            entry["lines"].append(text)
+            self.dirty = True
+            self.wakeup.set()
+
+    def _claim_due(self) -> tuple[int | None, float]:
+        # Returns (uid ready to send, seconds until the next one is due)
+        now, next_in = time.time(), 60.0
+        for uid, entry in self.pending.items():
+            if entry["due"] <= now:
+                return uid, 0.0
+            next_in = min(next_in, entry["due"] - now)
+        return None, next_in
+
+    async def _worker(self):
+        while True:
+            uid, wait_for = self._claim_due()
+            if uid is None:
+                self.wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), wait_for)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            entry = self.pending.pop(uid)
+            try:
+                await self._deliver(uid, entry["lines"])
+            except discord.Forbidden:
+                logging.warning("DMs closed for user %s; not trying again", uid)
+                self.blocked.add(uid)
+                self.pending.pop(uid, None)
+            except discord.NotFound:
+                logging.warning("User %s not found; dropping %d queued DM(s)", uid, len(entry["lines"]))
+            except (discord.HTTPException, OSError) as e:
+                entry["attempts"] += 1
+                if entry["attempts"] >= DM_MAX_ATTEMPTS:
+                    logging.error("Giving up on DM to %s after %d attempts: %s", uid, entry["attempts"], e)
+                else:
+                    entry["due"] = time.time() + DM_RETRY_BASE * 2 ** (entry["attempts"] - 1)
+                    # fold in anything queued for this user while we were sending
+                    for line in self.pending.pop(uid, {}).get("lines", []):
+                        if line not in entry["lines"]:
+                            entry["lines"].append(line)
+                    self.pending[uid] = entry
+            except Exception as e:
+                logging.error("Unexpected error sending DM to %s: %s", uid, e)
+            self.dirty = True
+
+    @traced("send dm", "rest")
+    async def _deliver(self, uid: int, lines: list[str]):
+        user = state.bot.get_user(uid) or await get_cached_user(uid)
+        chunk = ""
+        for line in lines:
+            if chunk and len(chunk) + len(line) + 1 > DM_MAX_LENGTH:
+                await user.send(chunk)
+                chunk = ""
+            chunk = f"{chunk}\n{line}" if chunk else line
+        if chunk:
+            await user.send(chunk)
+
+    async def _flusher(self):
+        # Persist the queue off the hot path, at most once a second
+        while True:
+            await asyncio.sleep(1)
+            if self.dirty:
+                try:
+                    self.save()
+                except OSError as e:
+                    logging.error("Could not save DM outbox: %s", e)
+
+dm_outbox = DMOutbox(OUTBOX_FILE)
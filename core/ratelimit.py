@@ -0,0 +1,24 @@
+import time
+import asyncio
+from collections import deque
+
+# ─────────────────────────────────────────────────────
+# Rate‐limit helper for embed edits & posts
+# ─────────────────────────────────────────────────────
+class RateLimiter:
+    def __init__(self, max_calls: int, per: float):
+        self.max_calls = max_calls
+        self.per       = per
+        self.calls     = deque()
+
+    async def wait(self):
+        now = time.monotonic()
+        # drop timestamps older than our window
+        while self.calls and now - self.calls[0] > self.per:
+            self.calls.popleft()
+
+        if len(self.calls) >= self.max_calls:
+            to_wait = self.per - (now - self.calls[0])
+            await asyncio.sleep(to_wait)
+
+        self.calls.append(time.monotonic())
@@ -0,0 +1,106 @@
+import sys
+
+# ─────────────────────────────────────────────────────
+# User registry: one int-keyed record per user
+# ─────────────────────────────────────────────────────
+# Replaces the old str(uid)-keyed user_stats / user_badges / user_timezones /
+# user_scores dicts. Badges are a bitmask over `badge_keys` (bit order is
+# persisted, new keys are appended), timezone names are interned so every
+# record pointing at "Europe/London" shares one string.
+
+class UserRecord:
+    __slots__ = ("raids_joined", "promotions", "badges", "tz", "score", "name")
+
+    def __init__(self, raids_joined=0, promotions=0, badges=0, tz=None, score=0, name=None):
+        self.raids_joined = raids_joined
+        self.promotions   = promotions
+        self.badges       = badges   # bitmask, see UserRegistry.badge_bit()
+        self.tz           = tz       # interned tz name or None
+        self.score        = score    # dice game total
+        self.name         = name     # last seen display name
+
+class UserRegistry:
+    def __init__(self):
+        self.users: dict[int, UserRecord] = {}
+        self.badge_keys: list[str] = []
+        self._badge_bits: dict[str, int] = {}
+
+    def __len__(self):
+        return len(self.users)
+
+    def get(self, uid: int) -> UserRecord | None:
+        return self.users.get(uid)
+
+    def record(self, uid: int) -> UserRecord:
+        rec = self.users.get(uid)
+        if rec is None:
+            rec = self.users[uid] = UserRecord()
+        return rec
+
+    # ─── Badges ───
+    def badge_bit(self, key: str) -> int:
+        bit = self._badge_bits.get(key)
+        if bit is None:
+            bit = self._badge_bits[key] = len(self.badge_keys)
+            self.badge_keys.append(key)
+        return 1 << bit
+
+    def has_badge(self, rec: UserRecord, key: str) -> bool:
+        return bool(rec.badges & self.badge_bit(key))
+
+    def add_badge(self, rec: UserRecord, key: str) -> bool:
+        bit = self.badge_bit(key)
+        if rec.badges & bit:
+            return False
+        rec.badges |= bit
+        return True
+
+    def badges_of(self, rec: UserRecord) -> list[str]:
+        return [key for i, key in enumerate(self.badge_keys) if rec.badges >> i & 1]
+
+    # ─── Timezones ───
+    @staticmethod
+    def set_tz(rec: UserRecord, tz_name: str | None):
+        rec.tz = sys.intern(tz_name) if tz_name else None
+
+    # ─── Persistence ───
+    def to_dict(self) -> dict:
+        # Timezones are written once in a table and referenced by index
+        tz_table: dict[str, int] = {}
+        users = {}
+        for uid, r in self.users.items():
+            tz_ref = tz_table.setdefault(r.tz, len(tz_table)) if r.tz else -1
+            users[str(uid)] = [r.raids_joined, r.promotions, r.badges, tz_ref, r.score, r.name]
+        return {"badges": self.badge_keys, "timezones": list(tz_table), "users": users}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "UserRegistry":
+        registry = cls()
+        for key in data.get("badges", []):
+            registry.badge_bit(key)
+        tz_table = [sys.intern(tz) for tz in data.get("timezones", [])]
+        for uid, (joined, promotions, badges, tz_ref, score, name) in data.get("users", {}).items():
+            registry.users[int(uid)] = UserRecord(
+                joined, promotions, badges, tz_table[tz_ref] if tz_ref >= 0 else None, score, name
+            )
+        return registry
+
+    @classmethod
+    def from_legacy(cls, stats: dict, badges: dict, timezones: dict, scores: dict) -> "UserRegistry":
+        # One-off import of badges.json / user_timezones.json / scores.json
+        registry = cls()
+        for uid, s in stats.items():
+            rec = registry.record(int(uid))
+            rec.raids_joined = s.get("raids_joined", 0)
+            rec.promotions   = s.get("promotions", 0)
+        for uid, keys in badges.items():
+            rec = registry.record(int(uid))
+            for key in keys:
+                registry.add_badge(rec, key)
+        for uid, tz_name in timezones.items():
+            registry.set_tz(registry.record(int(uid)), tz_name)
+        for uid, entry in scores.items():
+            rec = registry.record(int(uid))
+            rec.score = entry.get("score", 0)
+            rec.name  = entry.get("name")
+        return registry
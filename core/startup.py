@@ -0,0 +1,27 @@
+import time
+import logging
+
+# ─────────────────────────────────────────────────────
+# Startup timing
+# ─────────────────────────────────────────────────────
+# Phases are marked once each, in whatever order they happen, as milliseconds
+# since this module was first imported (the top of main.py).
+class StartupTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: dict[str, float] = {}   # phase → ms since start, in order reached
+
+    def mark(self, phase: str):
+        if phase in self.phases:
+            return
+        self.phases[phase] = (time.perf_counter() - self.started) * 1000
+        logging.info("Startup: %s at %.0f ms", phase, self.phases[phase])
+
+    def report(self) -> str:
+        parts, previous = [], 0.0
+        for phase, at in self.phases.items():
+            parts.append(f"{phase} {at:.0f} ms (+{at - previous:.0f})")
+            previous = at
+        return " | ".join(parts) or "nothing recorded"
+
+startup = StartupTimer()
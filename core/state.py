@@ -0,0 +1,150 @@
+import json
+import logging
+import asyncio
+from typing import TYPE_CHECKING
+
+from core.ratelimit import RateLimiter
+from core.attendance import AttendanceHistory
+from core.registry import UserRegistry
+from core.tracing import traced
+from core.waitlist import Waitlist
+
+if TYPE_CHECKING:
+    from discord.ext import commands
+
+# ─────────────────────────────────────────────────────
+# Shared state container
+# ─────────────────────────────────────────────────────
+# Everything that has to survive `!reload` lives on the one BotState instance.
+# Cogs are reloadable; this module is not, so in-memory data, locks and
+# pending tasks carry over when extension code is swapped.
+RAIDS_FILE    = "raids.json"
+ATTENDANCE_FILE = "attendance.json"
+USERS_FILE    = "users.json"
+# Pre-registry per-user files, read once to seed users.json
+BADGES_FILE   = "badges.json"
+TIMEZONE_FILE = "user_timezones.json"
+SCORES_FILE   = "scores.json"
+
+class BotState:
+    def __init__(self):
+        self.bot: "commands.Bot | None" = None
+        self.loading: asyncio.Future | None = None
+
+        # === Raid Data Structures ===
+        self.fireteams: dict[str, dict[int, int]] = {}   # { date_str: {slot_index: user_id} }
+        self.waitlists: dict[str, Waitlist]       = {}   # { date_str: Waitlist (unbounded, ordered) }
+        self.raid_log:  dict[str, list[str]]      = {}   # { date_str: [ "🛑 …", "✅ …", … ] }
+        self.promoted:  dict[str, set[int]]       = {}   # { date_str: {user_id promoted from backup} }
+        self.credited:  dict[str, set[int]]       = {}   # { date_str: {user_id already counted in raids_joined} }
+        self.reminder_sent: dict[str, bool]       = {}
+        self.recent_changes: dict[int, str]       = {}
+        self.previous_week_messages: list[int]    = []
+        self.last_schedule_date = None
+        self.update_tasks: dict[int, asyncio.Task] = {}
+        # Per-post reaction event queues and the worker draining each one
+        self.post_queues:  dict[int, asyncio.Queue] = {}
+        self.post_workers: dict[int, asyncio.Task]  = {}
+        # message_id → users a live reaction batch touched while a reconcile pass runs
+        self.reconcile_touched: dict[int, set[int]] = {}
+
+        self.slot_lock     = asyncio.Lock()
+        self.rotation_lock = asyncio.Lock()
+        self.reconcile_lock = asyncio.Lock()   # one reconcile pass at a time
+        # one instance each—call .wait() before each embed.edit() / rotation channel.send()
+        self.edit_limiter  = RateLimiter(max_calls=5, per=5.0)
+        self.post_limiter  = RateLimiter(max_calls=5, per=5.0)
+
+        # === Per-user records (stats, badges, timezone, dice score, name) ===
+        self.users = UserRegistry()
+
+        # === Attendance history (finished raids) ===
+        self.attendance = AttendanceHistory()
+
+    # ─── Persistence ───
+    def load_users(self):
+        try:
+            with open(USERS_FILE, "r") as f:
+                self.users = UserRegistry.from_dict(json.load(f))
+            return
+        except FileNotFoundError:
+            pass
+        except json.JSONDecodeError:
+            logging.exception("Corrupt %s, rebuilding from legacy files", USERS_FILE)
+
+        def read(path, default):
+            try:
+                with open(path, "r") as f:
+                    return json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                return default
+
+        badges = read(BADGES_FILE, {})
+        self.users = UserRegistry.from_legacy(
+            badges.get("stats", {}), badges.get("badges", {}),
+            read(TIMEZONE_FILE, {}), read(SCORES_FILE, {}),
+        )
+        if self.users:
+            logging.info("Migrated %d users into %s", len(self.users), USERS_FILE)
+            self.save_users()
+
+    @traced("save users", "io")
+    def save_users(self):
+        with open(USERS_FILE, "w") as f:
+            json.dump(self.users.to_dict(), f, separators=(",", ":"))
+
+    def load_raids(self):
+        try:
+            with open(RAIDS_FILE, "r") as f:
+                data = json.load(f)
+                self.fireteams = {k: {int(slot): v for slot, v in d.items()}
+                                  for k, d in data.get("fireteams", {}).items()}
+                self.waitlists = {k: Waitlist.from_list(rows) for k, rows in data.get("waitlists", {}).items()}
+                # Pre-waitlist files kept two numbered backup slots
+                for k, d in data.get("backups", {}).items():
+                    if k not in self.waitlists:
+                        self.waitlists[k] = Waitlist.from_list(
+                            [[uid, 0, int(slot)] for slot, uid in sorted(d.items(), key=lambda x: int(x[0]))]
+                        )
+                self.promoted  = {k: set(v) for k, v in data.get("promoted", {}).items()}
+                self.credited  = {k: set(v) for k, v in data.get("credited", {}).items()}
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.fireteams = {}
+            self.waitlists = {}
+            self.promoted  = {}
+            self.credited  = {}
+
+    @traced("save raids", "io")
+    def save_raids(self):
+        with open(RAIDS_FILE, "w") as f:
+            json.dump({
+                "fireteams": {k: v for k, v in self.fireteams.items()},
+                "waitlists": {k: v.to_list() for k, v in self.waitlists.items() if v},
+                "promoted":  {k: sorted(v) for k, v in self.promoted.items() if v},
+                "credited":  {k: sorted(v) for k, v in self.credited.items() if v}
+            }, f)
+
+    def load_attendance(self):
+        try:
+            with open(ATTENDANCE_FILE, "r") as f:
+                self.attendance = AttendanceHistory.from_dict(json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.attendance = AttendanceHistory()
+
+    @traced("save attendance", "io")
+    def save_attendance(self):
+        with open(ATTENDANCE_FILE, "w") as f:
+            json.dump(self.attendance.to_dict(), f, separators=(",", ":"))
+
+    async def load_all(self):
+        # Runs once per process; reloading a cog must not clobber live data.
+        # Files are parsed concurrently in worker threads, off the event loop.
+        if self.loading is None:
+            self.loading = asyncio.gather(
+                asyncio.to_thread(self.load_raids),
+                asyncio.to_thread(self.load_users),
+                asyncio.to_thread(self.load_attendance),
+            )
+        await self.loading
+
+state = BotState()
@@ -0,0 +1,191 @@
+import os
+import sys
+import json
+import time
+import queue
+import asyncio
+import logging
+import functools
+import itertools
+import threading
+from collections import Counter
+from contextlib import contextmanager, asynccontextmanager
+from contextvars import ContextVar
+from logging.handlers import QueueListener
+
+from core.logs import DeferredQueueHandler
+
+# ─────────────────────────────────────────────────────
+# Opt-in tracing (Chrome trace event format)
+# ─────────────────────────────────────────────────────
+# Each gateway event / command is a root span on its own track; fetches, sends,
+# lock waits and saves inside it are child spans. Events are written as a JSON
+# array to TRACE_FILE (open it in chrome://tracing or ui.perfetto.dev) by a
+# background thread, the same way log records are.
+TRACE_FILE      = os.getenv("TRACE_FILE", "trace.json")
+TRACE_ON_START  = os.getenv("TRACE", "0") == "1"
+SLOW_CALLBACK_MS = float(os.getenv("SLOW_CALLBACK_MS", "100"))
+PROFILE_INTERVAL = 0.005   # seconds between profiler samples
+
+trace_log = logging.getLogger("raid.trace")
+trace_log.propagate = False
+trace_log.setLevel(logging.INFO)
+
+_track: ContextVar[int | None] = ContextVar("trace_track", default=None)
+
+class Tracer:
+    def __init__(self, path: str):
+        self.path = path
+        self.enabled = False
+        self.listener: QueueListener | None = None
+        self.handler: logging.FileHandler | None = None
+        self.tracks = itertools.count(1)
+        self.pid = os.getpid()
+
+    def start(self):
+        if self.enabled:
+            return
+        fresh = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        self.handler = logging.FileHandler(self.path, encoding="utf-8")
+        self.handler.setFormatter(logging.Formatter("%(message)s"))
+        if fresh:
+            # JSON array format; trace viewers accept the missing closing "]"
+            self.handler.stream.write("[\n")
+        q = queue.SimpleQueue()
+        trace_log.handlers[:] = [DeferredQueueHandler(q)]
+        self.listener = QueueListener(q, self.handler)
+        self.listener.start()
+        self.enabled = True
+        logging.info("Tracing to %s", self.path)
+
+    def stop(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        self.listener.stop()
+        self.handler.close()
+        trace_log.handlers.clear()
+        logging.info("Tracing stopped")
+
+    def emit(self, event: dict):
+        trace_log.info("%s,", json.dumps(event, ensure_ascii=False))
+
+tracer = Tracer(TRACE_FILE)
+
+@contextmanager
+def span(name: str, cat: str = "raid", root: bool = False, **args):
+    """
+    Times the enclosed block. Without an enclosing span (or with root=True)
+    it starts a new track named after itself. No-op while tracing is off.
+    """
+    if not tracer.enabled:
+        yield
+        return
+
+    track, token = _track.get(), None
+    if track is None or root:
+        track = next(tracer.tracks)
+        token = _track.set(track)
+        tracer.emit({"name": "thread_name", "ph": "M", "pid": tracer.pid, "tid": track, "args": {"name": name}})
+
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        args["error"] = type(e).__name__
+        raise
+    finally:
+        tracer.emit({
+            "name": name, "cat": cat, "ph": "X", "pid": tracer.pid, "tid": track,
+            "ts": started * 1e6, "dur": (time.perf_counter() - started) * 1e6,
+            "args": args,
+        })
+        if token:
+            _track.reset(token)
+
+def traced(name: str, cat: str = "raid"):
+    # Decorator form of span() for sync and async functions
+    def wrap(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def run_async(*a, **kw):
+                with span(name, cat):
+                    return await fn(*a, **kw)
+            return run_async
+
+        @functools.wraps(fn)
+        def run(*a, **kw):
+            with span(name, cat):
+                return fn(*a, **kw)
+        return run
+    return wrap
+
+@asynccontextmanager
+async def traced_lock(lock: asyncio.Lock, name: str):
+    # Only the wait is a span; time spent holding the lock shows up as its siblings
+    with span(f"wait {name}", "lock"):
+        await lock.acquire()
+    try:
+        yield
+    finally:
+        lock.release()
+
+# ─────────────────────────────────────────────────────
+# Slow-callback detection
+# ─────────────────────────────────────────────────────
+def set_slow_callbacks(threshold_ms: float | None):
+    """
+    Turns asyncio debug mode on with the given threshold (any callback that
+    blocks the loop longer is logged by the "asyncio" logger), or off for None.
+    """
+    loop = asyncio.get_running_loop()
+    if threshold_ms is None:
+        loop.set_debug(False)
+        return
+    loop.slow_callback_duration = threshold_ms / 1000
+    loop.set_debug(True)
+
+# ─────────────────────────────────────────────────────
+# Sampling profiler
+# ─────────────────────────────────────────────────────
+def sample_stacks(thread_id: int, seconds: float, top: int = 15) -> tuple[int, list, list]:
+    """
+    Samples `thread_id`'s stack every PROFILE_INTERVAL for `seconds` (run it
+    off that thread). Returns (samples, top self frames, top total frames),
+    each frame as ((file, line, function), hits).
+    """
+    own, total = Counter(), Counter()
+    samples  = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        seen = set()
+        leaf = True
+        while frame is not None:
+            key = (frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name)
+            if leaf:
+                own[key] += 1
+                leaf = False
+            if key not in seen:   # recursion counts once per sample
+                total[key] += 1
+                seen.add(key)
+            frame = frame.f_back
+        samples += 1
+        time.sleep(PROFILE_INTERVAL)
+    return samples, own.most_common(top), total.most_common(top)
+
+async def profile_loop(seconds: float, top: int = 15) -> str:
+    # Profiles the event-loop thread while it keeps running
+    samples, own, total = await asyncio.to_thread(sample_stacks, threading.get_ident(), seconds, top)
+
+    def fmt(rows):
+        return [
+            f"{hits / samples:6.1%}  {os.path.relpath(path)}:{line} {func}"
+            for (path, line, func), hits in rows
+        ]
+
+    return "\n".join([
+        f"{samples} samples over {seconds:g}s",
+        "— self —", *fmt(own),
+        "— total —", *fmt(total),
+    ])
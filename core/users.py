@@ -0,0 +1,104 @@
+import os
+import time
+import logging
+import discord
+from collections import OrderedDict
+from discord.ext import tasks
+
+from core.state import state
+from core.tracing import span
+
+# === User Cache ===
+user_cache: dict[int, discord.User] = {}
+async def get_cached_user(uid: int) -> discord.User:
+    if uid not in user_cache:
+        with span("fetch user", "rest", uid=uid):
+            user_cache[uid] = await state.bot.fetch_user(uid)
+    return user_cache[uid]
+
+# === Member Cache Policy ===
+# "full"        → discord.py default: chunk every guild at startup, keep every member
+# "lazy"        → no chunking at startup; members cached as gateway events reveal them
+# "interactive" → no members intent or library cache; only members who react/press are
+#                 kept here, evicted once idle, with guild.fetch_member() as the fallback
+MEMBER_CACHE_POLICY = os.getenv("MEMBER_CACHE_POLICY", "full")
+MEMBER_IDLE_TTL     = int(os.getenv("MEMBER_IDLE_TTL", "3600"))   # seconds
+MEMBER_CACHE_MAX    = int(os.getenv("MEMBER_CACHE_MAX", "500"))
+
+# (guild_id, user_id) → (member, last_seen), oldest first
+member_cache: OrderedDict[tuple[int, int], tuple[discord.Member, float]] = OrderedDict()
+
+def remember_member(member) -> None:
+    if MEMBER_CACHE_POLICY != "interactive" or not isinstance(member, discord.Member):
+        return
+    key = (member.guild.id, member.id)
+    member_cache[key] = (member, time.monotonic())
+    member_cache.move_to_end(key)
+    while len(member_cache) > MEMBER_CACHE_MAX:
+        member_cache.popitem(last=False)
+
+async def get_member(guild: discord.Guild, uid: int) -> discord.Member | None:
+    member = guild.get_member(uid)
+    if member:
+        return member
+
+    entry = member_cache.get((guild.id, uid))
+    if entry:
+        remember_member(entry[0])
+        return entry[0]
+
+    try:
+        with span("fetch member", "rest", uid=uid):
+            member = await guild.fetch_member(uid)
+    except discord.NotFound:
+        return None
+    remember_member(member)
+    return member
+
+def resident_memory_mb() -> float | None:
+    # Current RSS from /proc (Linux); None where that isn't available
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def cache_report() -> str:
+    rss = resident_memory_mb()
+    return (
+        f"policy={MEMBER_CACHE_POLICY} "
+        f"rss={f'{rss:.1f}MB' if rss is not None else 'n/a'} "
+        f"guild_members={sum(len(g.members) for g in state.bot.guilds)} "
+        f"users={len(state.bot.users)} user_cache={len(user_cache)} member_cache={len(member_cache)}"
+    )
+
+@tasks.loop(minutes=5)
+async def evict_idle_members():
+    cutoff = time.monotonic() - MEMBER_IDLE_TTL
+    evicted = 0
+    while member_cache:
+        _, (_, last_seen) = next(iter(member_cache.items()))
+        if last_seen > cutoff:
+            break
+        member_cache.popitem(last=False)
+        evicted += 1
+    logging.info("Member cache: evicted %d idle, %s", evicted, cache_report())
+
+def member_cache_options() -> dict:
+    if MEMBER_CACHE_POLICY == "lazy":
+        return {"chunk_guilds_at_startup": False}
+    if MEMBER_CACHE_POLICY == "interactive":
+        return {"chunk_guilds_at_startup": False, "member_cache_flags": discord.MemberCacheFlags.none()}
+    return {}
+
+def peek_display_name(uid: int, guild: discord.Guild) -> str:
+    member = guild.get_member(uid)
+    if not member:
+        entry = member_cache.get((guild.id, uid))
+        member = entry[0] if entry else user_cache.get(uid)
+    if member:
+        return member.display_name
+    # Last name seen for this user (signup / dice roll), persisted in users.json
+    rec = state.users.get(uid)
+    return rec.name if rec and rec.name else str(uid)
@@ -0,0 +1,68 @@
+import heapq
+import itertools
+
+# ─────────────────────────────────────────────────────
+# Raid waitlist: a heap ordered by (tier, signup order)
+# ─────────────────────────────────────────────────────
+# Lower tier goes first; within a tier it's first come, first served. Leaving
+# only marks the heap entry dead (O(1)); dead entries are skipped when popped.
+
+_REMOVED = None
+
+class Waitlist:
+    def __init__(self):
+        self.heap: list[list] = []            # [tier, seq, uid]; uid is None once removed
+        self.entries: dict[int, list] = {}    # uid → its live heap entry
+        self.counter = itertools.count()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, uid: int) -> bool:
+        return uid in self.entries
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def add(self, uid: int, tier: int = 0) -> bool:
+        if uid in self.entries:
+            return False
+        entry = [tier, next(self.counter), uid]
+        self.entries[uid] = entry
+        heapq.heappush(self.heap, entry)
+        return True
+
+    def remove(self, uid: int) -> bool:
+        entry = self.entries.pop(uid, None)
+        if entry is None:
+            return False
+        entry[2] = _REMOVED
+        return True
+
+    def pop(self) -> int | None:
+        # Next in line, O(log n) amortised
+        while self.heap:
+            uid = heapq.heappop(self.heap)[2]
+            if uid is not _REMOVED:
+                del self.entries[uid]
+                return uid
+        return None
+
+    def top(self, n: int) -> list[int]:
+        # First n in line without popping them
+        return [e[2] for e in heapq.nsmallest(n, self.entries.values())]
+
+    # ─── Persistence ───
+    def to_list(self) -> list[list[int]]:
+        return [[uid, tier, seq] for tier, seq, uid in sorted(self.entries.values())]
+
+    @classmethod
+    def from_list(cls, rows: list) -> "Waitlist":
+        waitlist = cls()
+        for uid, tier, seq in rows:
+            entry = [tier, seq, uid]
+            waitlist.entries[uid] = entry
+            waitlist.heap.append(entry)
+        heapq.heapify(waitlist.heap)
+        waitlist.counter = itertools.count(max((row[2] for row in rows), default=-1) + 1)
+        return waitlist